@@ -8,19 +8,21 @@ import os
 import argparse
 import json
 
-def extract_comments(filename):
+def extract_comments(filename, content=None):
     """
     Извлекает docstring-комментарии и однострочные комментарии из указанного файла.
     Исключает f-строки и другие строковые литералы в тройных кавычках.
     
     Args:
         filename (str): Путь к Python файлу
+        content (str, optional): Уже прочитанное содержимое файла (если None, файл читается с диска)
         
     Returns:
         list: Список кортежей (строка, отступ, содержимое, начальная_строка, конечная_строка, тип_комментария)
     """
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read()
+    if content is None:
+        with open(filename, 'r', encoding='utf-8') as f:
+            content = f.read()
     
     # Разделяем файл на строки для определения номеров строк
     lines = content.split('\n')
@@ -190,20 +192,16 @@ def is_actual_docstring(content, start_pos, lines, start_line):
     # нет префиксов f, r и т.д., считаем это docstring
     return True
 
-def save_comments(comments, output_file, locations_file):
+def build_locations(comments):
     """
-    Сохраняет найденные комментарии в выходной файл и их расположение в файл локаций.
+    Формирует словарь с информацией о расположении комментариев.
     
     Args:
         comments (list): Список кортежей с информацией о комментариях
-        output_file (str): Имя файла для сохранения комментариев
-        locations_file (str): Имя файла для сохранения информации о расположении
+        
+    Returns:
+        dict: Словарь вида {"COMMENT_i": {start_line, end_line, indent, type, original_comment}}
     """
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for i, (full, indent, content, start, end, comment_type) in enumerate(comments):
-            f.write(f"[COMMENT_{i}]\n{full}\n[/COMMENT_{i}]\n\n")
-    
-    # Сохраняем информацию о расположении комментариев
     locations = {}
     for i, (full, indent, content, start, end, comment_type) in enumerate(comments):
         locations[f"COMMENT_{i}"] = {
@@ -213,46 +211,57 @@ def save_comments(comments, output_file, locations_file):
             "type": comment_type,
             "original_comment": content  # Сохраняем оригинальный комментарий для inline_end
         }
+    return locations
+
+def save_comments(comments, output_file, locations_file):
+    """
+    Сохраняет найденные комментарии в выходной файл и их расположение в файл локаций.
+    
+    Args:
+        comments (list): Список кортежей с информацией о комментариях
+        output_file (str): Имя файла для сохранения комментариев
+        locations_file (str): Имя файла для сохранения информации о расположении
+    """
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for i, (full, indent, content, start, end, comment_type) in enumerate(comments):
+            f.write(f"[COMMENT_{i}]\n{full}\n[/COMMENT_{i}]\n\n")
+    
+    # Сохраняем информацию о расположении комментариев
+    locations = build_locations(comments)
     
     with open(locations_file, 'w', encoding='utf-8') as f:
         json.dump(locations, f, indent=2)
 
-def replace_comments(source_file, translations_file, locations_file, output_file=None):
+def parse_translations(content):
     """
-    Заменяет комментарии в исходном файле на переведенные из файла переводов.
+    Извлекает переведенные комментарии из содержимого файла переводов.
     
     Args:
-        source_file (str): Исходный Python файл
-        translations_file (str): Файл с переведенными комментариями
-        locations_file (str): Файл с информацией о расположении комментариев
-        output_file (str, optional): Выходной файл (если None, создается копия исходного)
+        content (str): Содержимое файла с блоками [COMMENT_x]...[/COMMENT_x]
+        
+    Returns:
+        dict: Словарь {"COMMENT_i": переведенный комментарий}
     """
-    # Загружаем информацию о расположении комментариев
-    with open(locations_file, 'r', encoding='utf-8') as f:
-        locations = json.load(f)
-    
-    # Загружаем переведенные комментарии
-    with open(translations_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Извлекаем переведенные комментарии
     translations = {}
     pattern = r'\[COMMENT_(\d+)\]\n([\s\S]*?)\n\[/COMMENT_\1\]'
     for match in re.finditer(pattern, content):
         comment_id = f"COMMENT_{match.group(1)}"
         translated_content = match.group(2)
         translations[comment_id] = translated_content
+    return translations
+
+def inject_translations(source_lines, translations, locations):
+    """
+    Подставляет переведенные комментарии в строки исходного файла.
     
-    # Загружаем исходный файл
-    with open(source_file, 'r', encoding='utf-8') as f:
-        source_content = f.read()
-        source_lines = source_content.splitlines(True)  # Сохраняем символы новой строки
-    
-    # Если выходной файл не указан, создаем копию с суффиксом _translated
-    if output_file is None:
-        base_name, ext = os.path.splitext(source_file)
-        output_file = f"{base_name}_translated{ext}"
-    
+    Args:
+        source_lines (list): Строки исходного файла с символами новой строки
+        translations (dict): Словарь {"COMMENT_i": переведенный комментарий}
+        locations (dict): Информация о расположении комментариев
+        
+    Returns:
+        str: Новое содержимое файла
+    """
     # Создаем новое содержимое файла
     new_content = ""
     i = 0  # Текущая позиция в файле (номер строки)
@@ -347,6 +356,42 @@ def replace_comments(source_file, translations_file, locations_file, output_file
             new_content += source_lines[i]
             i += 1
     
+    return new_content
+
+def replace_comments(source_file, translations_file, locations_file, output_file=None):
+    """
+    Заменяет комментарии в исходном файле на переведенные из файла переводов.
+    
+    Args:
+        source_file (str): Исходный Python файл
+        translations_file (str): Файл с переведенными комментариями
+        locations_file (str): Файл с информацией о расположении комментариев
+        output_file (str, optional): Выходной файл (если None, создается копия исходного)
+    """
+    # Загружаем информацию о расположении комментариев
+    with open(locations_file, 'r', encoding='utf-8') as f:
+        locations = json.load(f)
+    
+    # Загружаем переведенные комментарии
+    with open(translations_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    # Извлекаем переведенные комментарии
+    translations = parse_translations(content)
+    
+    # Загружаем исходный файл
+    with open(source_file, 'r', encoding='utf-8') as f:
+        source_content = f.read()
+        source_lines = source_content.splitlines(True)  # Сохраняем символы новой строки
+    
+    # Если выходной файл не указан, создаем копию с суффиксом _translated
+    if output_file is None:
+        base_name, ext = os.path.splitext(source_file)
+        output_file = f"{base_name}_translated{ext}"
+    
+    # Создаем новое содержимое файла
+    new_content = inject_translations(source_lines, translations, locations)
+    
     # Сохраняем результат
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(new_content)
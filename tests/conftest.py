@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import types
+
+import pytest
+
+# Скрипты лежат в корне репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubTranslator:
+    """
+    Заглушка GoogleTranslator: не обращается к сети и запоминает отправленные строки.
+    """
+    calls = []
+
+    def __init__(self, source='auto', target='en'):
+        self.source = source
+        self.target = target
+
+    def translate(self, text):
+        StubTranslator.calls.append(text)
+        return f"<{text}>"
+
+    def get_supported_languages(self):
+        return ['en', 'ru']
+
+
+# Подменяем deep_translator до импорта скриптов
+_stub_module = types.ModuleType('deep_translator')
+_stub_module.GoogleTranslator = StubTranslator
+sys.modules['deep_translator'] = _stub_module
+
+import translate_from_to  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def reset_translator_state():
+    StubTranslator.calls = []
+    translate_from_to._TEMPLATE_MEMORY.clear()
+    for key in translate_from_to._TEMPLATE_STATS:
+        translate_from_to._TEMPLATE_STATS[key] = 0
+    yield
+
+
+@pytest.fixture
+def stub_translator():
+    return StubTranslator
+
+
+SAMPLE_SOURCE = '''"""Модуль загрузки"""
+# Шаг 1: загружаем config.yaml
+x = 1  # начальное значение
+def load():
+    """
+    Загружает данные
+    """
+    # Шаг 2: загружаем data.csv
+    return x
+'''
+
+
+@pytest.fixture
+def sample_source():
+    return SAMPLE_SOURCE
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+from extract_inject_comments import extract_comments, save_comments
+from translate_from_to import TranslationBudget, translate_comments
+from translate_pipeline import build_jobs, translate_files
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def extract(tmp_path, source_text):
+    source = str(tmp_path / 'src.py')
+    write(source, source_text)
+    ru_file = str(tmp_path / 'RU.txt')
+    save_comments(extract_comments(source), ru_file, f"{ru_file}.locations.json")
+    return ru_file
+
+
+def test_char_budget_skips_oversized_text():
+    budget = TranslationBudget(char_budget=10)
+    assert budget.try_consume(6)
+    assert not budget.try_consume(5)
+    # Более короткая строка еще помещается в остаток
+    assert budget.try_consume(4)
+    assert budget.exhausted
+    assert not budget.try_consume(1)
+
+
+def test_time_budget_expires():
+    budget = TranslationBudget(time_budget=0)
+    assert budget.is_limited()
+    assert not budget.try_consume(0)
+    assert not TranslationBudget().is_limited()
+
+
+def test_char_budget_counts_only_text_sent_to_translator(tmp_path, stub_translator):
+    ru_file = extract(tmp_path, '"""Модуль"""\nx = 1  # значение\n')
+    en_file = str(tmp_path / 'EN.txt')
+
+    # Кавычки, отступы и код перед # не списываются с бюджета
+    translate_comments(ru_file, en_file, 'ru', 'en', char_budget=len('Модуль') + len('значение'))
+
+    assert stub_translator.calls == ['Модуль', 'значение']
+    assert not os.path.exists(f"{en_file}.pending.json")
+
+
+def test_template_hits_do_not_consume_budget(tmp_path, stub_translator):
+    ru_file = extract(tmp_path, '# Шаг 1: загрузка\n# Шаг 2: загрузка\n# Шаг 3: загрузка\n')
+    en_file = str(tmp_path / 'EN.txt')
+
+    translate_comments(ru_file, en_file, 'ru', 'en', char_budget=len('Шаг __0__: загрузка'))
+
+    assert len(stub_translator.calls) == 1
+    assert read(en_file).count('<Шаг') == 3
+
+
+def test_budget_skip_and_resume(tmp_path, sample_source, stub_translator):
+    ru_file = extract(tmp_path, sample_source)
+    en_file = str(tmp_path / 'EN.txt')
+    pending_file = f"{en_file}.pending.json"
+    translate_comments(ru_file, en_file, 'ru', 'en', char_budget=len('Модуль загрузки') + len('Загружает данные'))
+
+    partial = read(en_file)
+    assert '<Модуль загрузки>' in partial and '<Загружает данные>' in partial
+    assert '# Шаг 1: загружаем config.yaml' in partial
+    with open(pending_file, 'r', encoding='utf-8') as f:
+        assert json.load(f)["pending"] == ['COMMENT_2', 'COMMENT_3', 'COMMENT_4']
+
+    # Повторный запуск переводит только оставшиеся комментарии
+    stub_translator.calls = []
+    translate_comments(ru_file, en_file, 'ru', 'en')
+    assert 'Модуль загрузки' not in stub_translator.calls
+    assert not os.path.exists(pending_file)
+
+    full_file = str(tmp_path / 'FULL.txt')
+    translate_comments(ru_file, full_file, 'ru', 'en')
+    assert read(en_file) == read(full_file)
+
+
+def test_oversized_docstring_is_skipped(tmp_path, stub_translator):
+    ru_file = extract(tmp_path, '"""Очень длинное описание модуля"""\n# коротко\n')
+    en_file = str(tmp_path / 'EN.txt')
+
+    translate_comments(ru_file, en_file, 'ru', 'en', char_budget=10)
+
+    # Не уместившийся docstring остается на следующий запуск, остальное переводится
+    assert stub_translator.calls == ['коротко']
+    with open(f"{en_file}.pending.json", 'r', encoding='utf-8') as f:
+        assert json.load(f)["pending"] == ['COMMENT_0']
+
+
+def test_time_budget_stops_translation(tmp_path, stub_translator):
+    ru_file = extract(tmp_path, '"""Модуль"""\n# коротко\n')
+    en_file = str(tmp_path / 'EN.txt')
+
+    translate_comments(ru_file, en_file, 'ru', 'en', time_budget=0)
+
+    assert stub_translator.calls == []
+    with open(f"{en_file}.pending.json", 'r', encoding='utf-8') as f:
+        assert json.load(f)["pending"] == ['COMMENT_0', 'COMMENT_1']
+
+
+def test_pipeline_budget_prioritizes_docstrings_across_files(tmp_path, stub_translator):
+    words = ['альфа', 'бета', 'гамма', 'дельта']
+    for word in words:
+        write(str(tmp_path / 'proj' / f'{word}.py'), f'x = 1  # конец {word}\n"""Модуль {word}"""\n')
+    proj, out = str(tmp_path / 'proj'), str(tmp_path / 'out')
+    manifest = os.path.join(out, 'pending.json')
+
+    budget = TranslationBudget(char_budget=sum(len(f'Модуль {word}') for word in words))
+    done, pending_count = translate_files(build_jobs([proj], out), 'ru', 'en', workers=2, max_files=1,
+                                          queue_size=1, budget=budget, manifest_file=manifest)
+
+    assert pending_count == len(words)
+    for word in words:
+        content = read(os.path.join(out, f'{word}.py'))
+        assert f'"""<Модуль {word}>"""' in content
+        assert f'# конец {word}' in content
+    assert os.path.exists(manifest)
+
+    # Повторный запуск переводит только оставшиеся комментарии и удаляет список
+    stub_translator.calls = []
+    done, pending_count = translate_files(build_jobs([proj], out), 'ru', 'en', manifest_file=manifest)
+
+    assert pending_count == 0
+    assert sorted(stub_translator.calls) == sorted(f'конец {word}' for word in words)
+    for word in words:
+        assert read(os.path.join(out, f'{word}.py')) == f'x = 1  # <конец {word}>\n"""<Модуль {word}>"""\n'
+    assert not os.path.exists(manifest)
+
+
+def test_resume_ignores_changed_input_or_languages(tmp_path, stub_translator):
+    ru_file = extract(tmp_path, '"""Модуль"""\n# первый\n# второй\n')
+    en_file = str(tmp_path / 'EN.txt')
+    translate_comments(ru_file, en_file, 'ru', 'en', char_budget=len('Модуль') + len('первый'))
+    assert os.path.exists(f"{en_file}.pending.json")
+
+    # Исходник изменился - старые переводы блоков с теми же номерами не переиспользуются
+    extract(tmp_path, '"""Другое описание"""\n# иное\n# второй\n')
+    translate_comments(ru_file, en_file, 'ru', 'de')
+
+    content = read(en_file)
+    assert '<Модуль>' not in content and '<первый>' not in content
+    assert '"""<Другое описание>"""' in content and '# <иное>' in content
+    assert not os.path.exists(f"{en_file}.pending.json")
+
+
+def test_resume_ignores_other_target_language(tmp_path, stub_translator):
+    ru_file = extract(tmp_path, '"""Модуль"""\n# первый\n')
+    en_file = str(tmp_path / 'EN.txt')
+    translate_comments(ru_file, en_file, 'ru', 'en', char_budget=len('Модуль'))
+
+    stub_translator.calls = []
+    translate_comments(ru_file, en_file, 'ru', 'de')
+
+    assert sorted(stub_translator.calls) == ['Модуль', 'первый']
+
+
+def test_pipeline_stops_passes_when_budget_exhausted(tmp_path, stub_translator, monkeypatch):
+    import translate_pipeline
+
+    write(str(tmp_path / 'proj' / 'a.py'), '# коротко\n"""Модуль"""\n')
+    out = str(tmp_path / 'out')
+    passes = []
+    original = translate_pipeline.run_pipeline
+
+    def counting_run_pipeline(*args, **kwargs):
+        passes.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(translate_pipeline, 'run_pipeline', counting_run_pipeline)
+    budget = TranslationBudget(time_budget=0)
+    done, pending_count = translate_files(build_jobs([str(tmp_path / 'proj')], out), 'ru', 'en', budget=budget)
+
+    assert len(passes) == 1
+    assert pending_count == 2
+    assert stub_translator.calls == []
+    assert read(os.path.join(out, 'a.py')) == '# коротко\n"""Модуль"""\n'
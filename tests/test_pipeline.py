@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from extract_inject_comments import extract_comments, save_comments, replace_comments
+from translate_from_to import translate_comments
+from translate_pipeline import build_jobs, run_pipeline
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_pipeline_matches_staged_flow(tmp_path, sample_source):
+    source = str(tmp_path / 'proj' / 'a.py')
+    write(source, sample_source)
+
+    ru_file = str(tmp_path / 'RU.txt')
+    en_file = str(tmp_path / 'EN.txt')
+    save_comments(extract_comments(source), ru_file, f"{ru_file}.locations.json")
+    translate_comments(ru_file, en_file, 'ru', 'en')
+    staged = read(replace_comments(source, en_file, f"{ru_file}.locations.json",
+                                   str(tmp_path / 'staged.py')))
+
+    jobs = build_jobs([str(tmp_path / 'proj')], str(tmp_path / 'out'))
+    done = run_pipeline(jobs, 'ru', 'en', workers=3, max_files=1, queue_size=1)
+
+    assert [job.error for job in done] == [None]
+    assert read(str(tmp_path / 'out' / 'a.py')) == staged
+    assert '<Модуль загрузки>' in staged
+
+
+def test_pipeline_processes_many_files_with_small_queues(tmp_path, sample_source):
+    for name in ['a.py', 'b.py', 'sub/c.py', 'sub/empty.py']:
+        write(str(tmp_path / 'proj' / name), '' if 'empty' in name else sample_source)
+
+    jobs = build_jobs([str(tmp_path / 'proj')], str(tmp_path / 'out'))
+    done = run_pipeline(jobs, 'ru', 'en', workers=4, max_files=2, queue_size=2)
+
+    assert len(done) == 4
+    assert all(job.error is None for job in done)
+    assert read(str(tmp_path / 'out' / 'sub' / 'c.py')) == read(str(tmp_path / 'out' / 'a.py'))
+    assert read(str(tmp_path / 'out' / 'sub' / 'empty.py')) == ''
+
+
+def test_build_jobs_deduplicates_sources(tmp_path, sample_source):
+    write(str(tmp_path / 'proj' / 'a.py'), sample_source)
+    write(str(tmp_path / 'proj' / 'sub' / 'b.py'), sample_source)
+    proj = str(tmp_path / 'proj')
+
+    jobs = build_jobs([os.path.join(proj, 'a.py'),
+                       os.path.join(proj, 'sub', 'b.py'),
+                       os.path.join(proj, 'sub', '..', 'sub', 'b.py')], str(tmp_path / 'out'))
+
+    assert [os.path.basename(job.source_file) for job in jobs] == ['a.py', 'b.py']
+
+
+def test_build_jobs_rejects_output_collisions(tmp_path, sample_source):
+    write(str(tmp_path / 'one' / 'x.py'), sample_source)
+    write(str(tmp_path / 'two' / 'x.py'), sample_source)
+
+    with pytest.raises(ValueError):
+        build_jobs([str(tmp_path / 'one' / 'x.py'), str(tmp_path / 'two' / 'x.py')], str(tmp_path / 'out'))
+
+    # Выходной каталог совпадает с исходным - исходники были бы перезаписаны
+    with pytest.raises(ValueError):
+        build_jobs([str(tmp_path / 'one')], str(tmp_path / 'one'))
+
+
+def test_nested_output_dir_is_not_treated_as_source(tmp_path, sample_source):
+    proj = str(tmp_path / 'proj')
+    out = os.path.join(proj, 'en')
+    write(os.path.join(proj, 'a.py'), sample_source)
+
+    run_pipeline(build_jobs([proj], out), 'ru', 'en')
+    first = read(os.path.join(out, 'a.py'))
+
+    # Повторный запуск той же командой не должен считать результаты исходниками
+    jobs = build_jobs([proj], out)
+    assert [os.path.basename(job.source_file) for job in jobs] == ['a.py']
+    run_pipeline(jobs, 'ru', 'en')
+    assert read(os.path.join(out, 'a.py')) == first
+    assert not os.path.exists(os.path.join(out, 'en'))
+
+
+def test_translation_errors_are_not_reported_as_budget(tmp_path, sample_source, stub_translator,
+                                                        monkeypatch, capsys):
+    import translate_pipeline
+
+    def failing_init(self, source='auto', target='en'):
+        raise RuntimeError('сеть недоступна')
+
+    # Ошибка вне построчной обработки - блок целиком остается непереведенным
+    monkeypatch.setattr(stub_translator, '__init__', failing_init)
+    write(str(tmp_path / 'proj' / 'a.py'), '# коротко\n')
+    out = str(tmp_path / 'out')
+    monkeypatch.setattr('sys.argv', ['translate_pipeline.py', str(tmp_path / 'proj'), '-d', out])
+
+    translate_pipeline.main()
+
+    captured = capsys.readouterr()
+    assert 'Бюджет исчерпан' not in captured.out
+    assert 'Не удалось перевести из-за ошибок комментариев: 1' in captured.err
+    assert os.path.exists(os.path.join(out, 'translate_pipeline.pending.json'))
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+from translate_from_to import normalize_text, restore_text, translate_text, _TEMPLATE_STATS
+
+
+class DroppingTranslator:
+    """
+    Переводчик, теряющий метки шаблона.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def translate(self, text):
+        self.calls.append(text)
+        return 'EN ' + text.replace('__0__', '')
+
+
+def round_trip(text):
+    template, values, prefix, suffix = normalize_text(text)
+    return prefix + restore_text(template, values) + suffix
+
+
+def test_masks_numbers_identifiers_and_paths():
+    template, values, prefix, suffix = normalize_text('  Шаг 1: загружаем  config.yaml из `cfg` и src/app/main.py.')
+
+    assert template == 'Шаг __0__: загружаем __1__ из __2__ и __3__'
+    assert values == ['1', 'config.yaml', '`cfg`', 'src/app/main.py']
+    assert (prefix, suffix) == ('  ', '.')
+
+
+def test_near_duplicates_share_template():
+    first = normalize_text('Шаг 1: загружаем config.yaml')[0]
+    second = normalize_text('Шаг 2: загружаем data.csv!')[0]
+
+    assert first == second
+
+
+def test_urls_are_masked_whole():
+    template, values, _, suffix = normalize_text('см. https://docs.python.org/3/library/re.html.')
+
+    assert template == 'см. __0__'
+    assert values == ['https://docs.python.org/3/library/re.html']
+    assert suffix == '.'
+    assert round_trip('ссылка https://example.com/a?b=1, далее') == 'ссылка https://example.com/a?b=1, далее'
+
+
+def test_windows_paths_are_masked_with_drive():
+    template, values, _, _ = normalize_text('лежит в C:\\data\\file.txt')
+
+    assert template == 'лежит в __0__'
+    assert values == ['C:\\data\\file.txt']
+
+
+def test_digits_attached_to_words_are_not_masked():
+    template, values, _, _ = normalize_text('файл2 загружен за 5мс, всего 10 файлов')
+
+    assert template == 'файл2 загружен за 5мс, всего __0__ файлов'
+    assert values == ['10']
+
+
+def test_round_trip_restores_values():
+    for text in ['Шаг 1: загружаем config.yaml', 'вызов os.path.join() для ~/dir/x.py', 'версия 3.14']:
+        assert round_trip(text) == text
+
+
+def test_restore_fails_on_lost_or_duplicated_placeholders():
+    assert restore_text('Step : load __1__', ['1', 'config.yaml']) is None
+    assert restore_text('__0__ __0__ __1__', ['1', 'config.yaml']) is None
+    assert restore_text('Step __ 1 __ loads __0__', ['1', 'config.yaml']) == 'Step config.yaml loads 1'
+
+
+def test_template_translated_once(stub_translator):
+    translator = stub_translator()
+    results = [translate_text(translator, f'Шаг {i}: загружаем file{i}.csv', 'ru', 'en') for i in range(3)]
+
+    assert stub_translator.calls == ['Шаг __0__: загружаем __1__']
+    assert results[2] == '<Шаг 2: загружаем file2.csv>'
+    assert (_TEMPLATE_STATS['lookups'], _TEMPLATE_STATS['hits']) == (3, 2)
+
+
+def test_broken_template_is_not_counted_as_hit():
+    translator = DroppingTranslator()
+    results = [translate_text(translator, f'Шаг {i}: готово', 'ru', 'en') for i in range(3)]
+
+    # Шаблон отправлен один раз, дальше текст переводится целиком
+    assert translator.calls == ['Шаг __0__: готово', 'Шаг 0: готово', 'Шаг 1: готово', 'Шаг 2: готово']
+    assert results == ['EN Шаг 0: готово', 'EN Шаг 1: готово', 'EN Шаг 2: готово']
+    assert _TEMPLATE_STATS['hits'] == 0
+    assert _TEMPLATE_STATS['backend_calls'] == 4
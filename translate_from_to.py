@@ -3,8 +3,12 @@
 
 
 import argparse
+import hashlib
+import json
 import re
 import sys
+import threading
+import time
 from pathlib import Path
 from deep_translator import GoogleTranslator
 
@@ -24,6 +28,30 @@ _LANG_PATTERNS = {
 # Используем кэш для ускорения повторных проверок
 _CACHE_HITS = {}
 
+# Значения, которые маскируются перед переводом: `код`, URL, пути, точечные идентификаторы и числа.
+# Идентификаторы и пути ищутся только среди ASCII-символов, а числа маскируются,
+# только если не приклеены к слову (в том числе кириллическому, например "5мс")
+_MASK_PATTERN = re.compile(
+    r'`[^`\n]+`'
+    r'|[A-Za-z][A-Za-z0-9+.-]*://\S*[^\s.,;:!?)\]]'
+    r'|(?:(?<![A-Za-z0-9_])[A-Za-z]:)?(?:[A-Za-z0-9_.~-]*[/\\])+[A-Za-z0-9_.-]+'
+    r'|(?<![A-Za-z0-9_.])[A-Za-z_][A-Za-z0-9_-]*(?:\.[A-Za-z0-9_-]+)+'
+    r'|(?<![\w.])[0-9]+(?:[.,][0-9]+)*(?!\w)'
+)
+_PLACEHOLDER_PATTERN = re.compile(r'_\s*_\s*(\d+)\s*_\s*_')
+_TRAILING_PUNCTUATION = '.,;:!?…'
+
+# Память переводов по нормализованным шаблонам и статистика обращений к ней.
+# None означает, что переводчик портит метки шаблона и текст нужно переводить целиком
+_TEMPLATE_MEMORY = {}
+_TEMPLATE_STATS = {
+    'lookups': 0,
+    'hits': 0,
+    'backend_calls': 0,
+    'fallbacks': 0
+}
+_TEMPLATE_LOCK = threading.Lock()
+
 def has_text_in_source_language(text, source_lang):
     """
     Проверяет наличие символов исходного языка в тексте (оптимизированная версия)
@@ -56,7 +84,239 @@ def has_text_in_source_language(text, source_lang):
     _CACHE_HITS[cache_key] = False
     return False
 
-def translate_comment_block(content, source_lang, target_lang):
+# Приоритет типов комментариев при ограниченном бюджете перевода (меньше - важнее)
+_TYPE_PRIORITY = {
+    'docstring': 0,
+    'inline': 1,
+    'inline_end': 2
+}
+
+class BudgetExceeded(Exception):
+    """
+    Бюджет перевода исчерпан: блок комментария нужно оставить без изменений.
+    """
+
+class TranslationBudget:
+    """
+    Бюджет перевода по времени и/или количеству символов, отправляемых переводчику.
+    Безопасен для использования из нескольких потоков.
+    """
+    def __init__(self, time_budget=None, char_budget=None):
+        """
+        Args:
+            time_budget (float, optional): Лимит времени в секундах (None - без ограничения)
+            char_budget (int, optional): Лимит количества символов, отправляемых на перевод (None - без ограничения)
+        """
+        self.deadline = time.monotonic() + time_budget if time_budget is not None else None
+        self.chars_left = char_budget
+        self.exhausted = False
+        self.lock = threading.Lock()
+
+    def is_limited(self):
+        """
+        Returns:
+            bool: True если задан хотя бы один лимит
+        """
+        return self.deadline is not None or self.chars_left is not None
+
+    def try_consume(self, chars):
+        """
+        Резервирует бюджет на отправку переводчику строки указанной длины.
+        Строка, не помещающаяся в оставшийся лимит символов, пропускается, а более
+        короткие строки еще могут поместиться. Бюджет считается исчерпанным, когда
+        истекло время или не осталось ни одного символа. Уже начатый перевод
+        не прерывается, поэтому лимит времени может быть превышен на время одного запроса.
+        
+        Args:
+            chars (int): Количество символов, отправляемых переводчику
+            
+        Returns:
+            bool: True если строка помещается в оставшийся бюджет
+        """
+        with self.lock:
+            if self.exhausted:
+                return False
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                self.exhausted = True
+                return False
+            if self.chars_left is not None:
+                if chars > self.chars_left:
+                    return False
+                self.chars_left -= chars
+                if self.chars_left == 0:
+                    self.exhausted = True
+            return True
+
+def schedule_segments(comment_ids, locations):
+    """
+    Упорядочивает комментарии по приоритету перевода: сначала docstring,
+    затем однострочные комментарии, затем комментарии в конце строки.
+    Внутри одного типа сохраняется исходный порядок.
+    
+    Args:
+        comment_ids (list): Идентификаторы комментариев ("COMMENT_i")
+        locations (dict): Информация о расположении комментариев (поле type)
+        
+    Returns:
+        list: Идентификаторы комментариев в порядке перевода
+    """
+    return sorted(comment_ids, key=lambda comment_id: comment_priority(locations.get(comment_id, {}).get('type')))
+
+def comment_priority(comment_type):
+    """
+    Возвращает приоритет перевода для типа комментария (меньше - важнее).
+    Неизвестные типы получают наименьший приоритет.
+    
+    Args:
+        comment_type (str): Тип комментария ('docstring', 'inline', 'inline_end')
+        
+    Returns:
+        int: Приоритет от 0 до comment_priority(None)
+    """
+    return _TYPE_PRIORITY.get(comment_type, len(_TYPE_PRIORITY))
+
+def normalize_text(text):
+    """
+    Приводит текст к шаблону: маскирует числа, идентификаторы в обратных кавычках,
+    точечные идентификаторы и пути, схлопывает пробелы и отделяет
+    пробелы и знаки препинания по краям.
+    
+    Args:
+        text (str): Исходный текст
+        
+    Returns:
+        tuple: (шаблон, список замаскированных значений, префикс, суффикс)
+    """
+    values = []
+    
+    def mask(match):
+        values.append(match.group(0))
+        return f"__{len(values) - 1}__"
+    
+    stripped = text.strip()
+    prefix = text[:len(text) - len(text.lstrip())]
+    suffix = text[len(prefix) + len(stripped):]
+    
+    # Знаки препинания в конце не влияют на перевод - переносим их в суффикс
+    core = stripped.rstrip(_TRAILING_PUNCTUATION)
+    suffix = stripped[len(core):] + suffix
+    
+    template = ' '.join(_MASK_PATTERN.sub(mask, core).split())
+    return template, values, prefix, suffix
+
+def restore_text(translated_template, values):
+    """
+    Подставляет замаскированные значения обратно в переведенный шаблон.
+    
+    Args:
+        translated_template (str): Переведенный шаблон с метками __N__
+        values (list): Значения, замаскированные функцией normalize_text
+        
+    Returns:
+        str: Текст с восстановленными значениями или None, если переводчик
+            потерял или продублировал метки
+    """
+    found = [int(index) for index in _PLACEHOLDER_PATTERN.findall(translated_template)]
+    if sorted(found) != list(range(len(values))):
+        return None
+    return _PLACEHOLDER_PATTERN.sub(lambda match: values[int(match.group(1))], translated_template)
+
+def request_translation(translator, text, budget=None):
+    """
+    Отправляет текст переводчику, списывая его длину с бюджета.
+    
+    Args:
+        translator: Объект переводчика с методом translate()
+        text (str): Текст для перевода
+        budget (TranslationBudget, optional): Бюджет перевода
+        
+    Returns:
+        str: Переведенный текст
+        
+    Raises:
+        BudgetExceeded: Если текст не помещается в оставшийся бюджет
+    """
+    if budget is not None and not budget.try_consume(len(text)):
+        raise BudgetExceeded()
+    with _TEMPLATE_LOCK:
+        _TEMPLATE_STATS['backend_calls'] += 1
+    return translator.translate(text)
+
+def translate_text(translator, text, source_lang, target_lang, budget=None):
+    """
+    Переводит текст через память шаблонов: комментарии, отличающиеся только
+    числами, идентификаторами, путями, пробелами или знаками препинания
+    в конце, переводятся одним запросом к переводчику.
+    
+    Args:
+        translator: Объект переводчика с методом translate()
+        text (str): Текст для перевода
+        source_lang (str): Исходный язык (код языка)
+        target_lang (str): Целевой язык (код языка)
+        budget (TranslationBudget, optional): Бюджет перевода; списываются только
+            символы, действительно отправленные переводчику
+        
+    Returns:
+        str: Переведенный текст
+        
+    Raises:
+        BudgetExceeded: Если для перевода не хватает бюджета
+    """
+    # Текст, уже содержащий похожие на метки фрагменты, переводим как есть
+    if _PLACEHOLDER_PATTERN.search(text):
+        return request_translation(translator, text, budget)
+    
+    template, values, prefix, suffix = normalize_text(text)
+    
+    # После маскирования не осталось текста для перевода
+    if not has_text_in_source_language(template, source_lang):
+        return text
+    
+    key = (source_lang, target_lang, template)
+    with _TEMPLATE_LOCK:
+        _TEMPLATE_STATS['lookups'] += 1
+        known = key in _TEMPLATE_MEMORY
+        translated_template = _TEMPLATE_MEMORY.get(key)
+        if translated_template is not None:
+            _TEMPLATE_STATS['hits'] += 1
+    
+    # Шаблон уже известен как непригодный - сразу переводим текст целиком
+    if known and translated_template is None:
+        with _TEMPLATE_LOCK:
+            _TEMPLATE_STATS['fallbacks'] += 1
+        return request_translation(translator, text, budget)
+    
+    if translated_template is not None:
+        # В память попадают только шаблоны с проверенными метками
+        return prefix + restore_text(translated_template, values).strip() + suffix
+    
+    translated_template = request_translation(translator, template, budget)
+    restored = restore_text(translated_template, values)
+    if restored is None:
+        # Переводчик испортил метки - запоминаем это и переводим исходный текст целиком
+        with _TEMPLATE_LOCK:
+            _TEMPLATE_MEMORY[key] = None
+            _TEMPLATE_STATS['fallbacks'] += 1
+        return request_translation(translator, text, budget)
+    
+    with _TEMPLATE_LOCK:
+        _TEMPLATE_MEMORY[key] = translated_template
+    return prefix + restored.strip() + suffix
+
+def get_template_stats():
+    """
+    Формирует отчет об использовании памяти шаблонов.
+    
+    Returns:
+        str: Количество обращений, попаданий в шаблоны и запросов к переводчику
+    """
+    with _TEMPLATE_LOCK:
+        stats = dict(_TEMPLATE_STATS)
+    hit_rate = stats['hits'] / stats['lookups'] * 100 if stats['lookups'] else 0.0
+    return (f"Память шаблонов: {stats['lookups']} обращений, {stats['hits']} попаданий ({hit_rate:.1f}%), "
+            f"{stats['backend_calls']} запросов к переводчику, {stats['fallbacks']} повторных переводов без шаблона")
+
+def translate_comment_block(content, source_lang, target_lang, budget=None):
     """
     Переводит блок комментария, сохраняя форматирование и отступы
     
@@ -64,9 +324,13 @@ def translate_comment_block(content, source_lang, target_lang):
         content (str): Содержимое блока комментария
         source_lang (str): Исходный язык (код языка)
         target_lang (str): Целевой язык (код языка)
+        budget (TranslationBudget, optional): Бюджет перевода
         
     Returns:
         str: Переведенный блок комментария с сохранением форматирования
+        
+    Raises:
+        BudgetExceeded: Если бюджет исчерпан до окончания перевода блока
     """
     # Создаем переводчик
     translator = GoogleTranslator(source=source_lang, target=target_lang)
@@ -104,10 +368,12 @@ def translate_comment_block(content, source_lang, target_lang):
             if has_text_in_source_language(comment_text, source_lang):
                 try:
                     # Переводим только текст комментария
-                    translated_comment = translator.translate(comment_text)
+                    translated_comment = translate_text(translator, comment_text, source_lang, target_lang, budget)
                     # Собираем строку обратно: код + # + переведенный комментарий
                     translated_text = code_part + comment_prefix + translated_comment
                     translated_lines.append(indent + translated_text)
+                except BudgetExceeded:
+                    raise
                 except Exception as e:
                     print(f"Ошибка перевода: {str(e)}, строка: {comment_text}", file=sys.stderr)
                     translated_lines.append(line)  # Оставляем оригинал при ошибке
@@ -123,7 +389,7 @@ def translate_comment_block(content, source_lang, target_lang):
                 if text.startswith('"""') and text.endswith('"""'):
                     inner_text = text[3:-3]
                     if has_text_in_source_language(inner_text, source_lang):
-                        translated_inner = translator.translate(inner_text)
+                        translated_inner = translate_text(translator, inner_text, source_lang, target_lang, budget)
                         translated_text = '"""' + translated_inner + '"""'
                     else:
                         translated_text = text
@@ -141,7 +407,7 @@ def translate_comment_block(content, source_lang, target_lang):
                         quotes_end = ""
                     
                     if has_text_in_source_language(inner_text, source_lang):
-                        translated_inner = translator.translate(inner_text)
+                        translated_inner = translate_text(translator, inner_text, source_lang, target_lang, budget)
                         if quote_start > 0:
                             translated_text = '"""' + translated_inner + quotes_end
                         else:
@@ -155,13 +421,15 @@ def translate_comment_block(content, source_lang, target_lang):
                     comment_text = text[len(comment_prefix):]
                     
                     if has_text_in_source_language(comment_text, source_lang):
-                        translated_comment = translator.translate(comment_text)
+                        translated_comment = translate_text(translator, comment_text, source_lang, target_lang, budget)
                         translated_text = comment_prefix + translated_comment
                     else:
                         translated_text = text
                 else:
                     # Все остальные строки с символами исходного языка
-                    translated_text = translator.translate(text)
+                    translated_text = translate_text(translator, text, source_lang, target_lang, budget)
+            except BudgetExceeded:
+                raise
             except Exception as e:
                 print(f"Ошибка перевода: {str(e)}, строка: {text}", file=sys.stderr)
                 translated_text = text  # В случае ошибки оставляем оригинальный текст
@@ -175,15 +443,22 @@ def translate_comment_block(content, source_lang, target_lang):
     # Объединяем строки обратно в текст
     return '\n'.join(translated_lines)
 
-def translate_comments(input_file, output_file, source_lang, target_lang):
+def translate_comments(input_file, output_file, source_lang, target_lang, time_budget=None, char_budget=None):
     """
-    Переводит комментарии из исходного файла в выходной, сохраняя структуру
+    Переводит комментарии из исходного файла в выходной, сохраняя структуру.
+    
+    При заданном бюджете комментарии переводятся в порядке приоритета, пока
+    бюджет не исчерпан. Остальные остаются без изменений, а их список сохраняется
+    в файл <output_file>.pending.json - при следующем запуске с тем же входным
+    файлом переведены будут только они.
     
     Args:
         input_file (str): Путь к входному файлу с комментариями
         output_file (str): Путь к выходному файлу для сохранения переведенных комментариев
         source_lang (str): Исходный язык (код языка)
         target_lang (str): Целевой язык (код языка)
+        time_budget (float, optional): Лимит времени на перевод в секундах
+        char_budget (int, optional): Лимит количества символов, отправляемых на перевод
         
     Returns:
         bool: True в случае успешного перевода
@@ -199,27 +474,75 @@ def translate_comments(input_file, output_file, source_lang, target_lang):
         content = f.read()
     
     # Находим все блоки комментариев
-    pattern = r'(\[COMMENT_\d+\]\n)([\s\S]*?)(\n\[/COMMENT_\d+\])'
+    pattern = r'(\[COMMENT_(\d+)\]\n)([\s\S]*?)(\n\[/COMMENT_\2\])'
+    blocks = {f"COMMENT_{match.group(2)}": match.group(3) for match in re.finditer(pattern, content)}
+    
+    # Типы комментариев берем из файла локаций, созданного при извлечении
+    locations = {}
+    locations_path = Path(f"{input_file}.locations.json")
+    if locations_path.exists():
+        with open(locations_path, 'r', encoding='utf-8') as f:
+            locations = json.load(f)
+    
+    # Если предыдущий запуск не уложился в бюджет, переиспользуем уже готовые переводы,
+    # но только для того же входного файла с тем же содержимым и теми же языками
+    run_info = {
+        "input_file": str(input_path.resolve()),
+        "input_hash": hashlib.sha1(content.encode('utf-8')).hexdigest(),
+        "source_lang": source_lang,
+        "target_lang": target_lang
+    }
+    translated = {}
+    output_path = Path(output_file)
+    pending_path = Path(f"{output_file}.pending.json")
+    if pending_path.exists() and output_path.exists():
+        with open(pending_path, 'r', encoding='utf-8') as f:
+            pending_info = json.load(f)
+        if all(pending_info.get(key) == value for key, value in run_info.items()):
+            with open(output_path, 'r', encoding='utf-8') as f:
+                previous_content = f.read()
+            pending_ids = set(pending_info.get("pending", []))
+            for match in re.finditer(pattern, previous_content):
+                comment_id = f"COMMENT_{match.group(2)}"
+                if comment_id in blocks and comment_id not in pending_ids:
+                    translated[comment_id] = match.group(3)
+    
+    # Переводим оставшиеся блоки в порядке приоритета, пока позволяет бюджет
+    budget = TranslationBudget(time_budget, char_budget)
+    pending = []
+    for comment_id in schedule_segments([c for c in blocks if c not in translated], locations):
+        try:
+            translated[comment_id] = translate_comment_block(blocks[comment_id], source_lang, target_lang, budget)
+        except BudgetExceeded:
+            # Блок, на котором закончился бюджет, остается без изменений целиком
+            pending.append(comment_id)
     
     # Функция для обработки каждого блока комментариев
     def replace_block(match):
         start_marker = match.group(1)
-        comment_content = match.group(2)
-        end_marker = match.group(3)
-        
-        # Переводим содержимое блока
-        translated_content = translate_comment_block(comment_content, source_lang, target_lang)
+        comment_id = f"COMMENT_{match.group(2)}"
+        end_marker = match.group(4)
         
-        return start_marker + translated_content + end_marker
+        # Непереведенные блоки оставляем в оригинале
+        return start_marker + translated.get(comment_id, match.group(3)) + end_marker
     
     # Заменяем каждый блок комментариев переведенным блоком
     translated_content = re.sub(pattern, replace_block, content)
     
     # Запись в выходной файл
-    output_path = Path(output_file)
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(translated_content)
     
+    # Сохраняем список непереведенных блоков для следующего запуска
+    if pending:
+        pending.sort(key=lambda comment_id: int(comment_id.split('_')[1]))
+        with open(pending_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(run_info, pending=pending), f, indent=2)
+        print(f"Бюджет исчерпан: не переведено {len(pending)} из {len(blocks)} комментариев.")
+        print(f"Список сохранен в файл: {pending_path}")
+    elif pending_path.exists():
+        pending_path.unlink()
+    
     return True
 
 def get_supported_languages():
@@ -257,6 +580,10 @@ def main():
   python translate_ru_to_en.py input.txt output.txt --source fr --target es
     Переводит комментарии с французского на испанский
 
+  python translate_ru_to_en.py input.txt output.txt --time-budget 300
+    Переводит за 5 минут сначала docstring, затем остальные комментарии;
+    непереведенное будет переведено при повторном запуске той же командой
+
 {supported_languages_info}
 
 Примечание: Для проверки наличия символов исходного языка используются 
@@ -269,6 +596,8 @@ ru, zh, ja, ko, ar, he, el, hi, th.
     parser.add_argument('output_file', nargs='?', help='Путь к выходному файлу (для переведенных комментариев)')
     parser.add_argument('-s', '--source', default='ru', help='Исходный язык (по умолчанию: ru)')
     parser.add_argument('-t', '--target', default='en', help='Целевой язык (по умолчанию: en)')
+    parser.add_argument('--time-budget', type=float, help='Лимит времени на перевод в секундах (остальное переводится при следующем запуске)')
+    parser.add_argument('--char-budget', type=int, help='Лимит количества символов, отправляемых на перевод')
     parser.add_argument('-l', '--list-langs', action='store_true', help='Показать список поддерживаемых языков и выйти')
     
     args = parser.parse_args()
@@ -287,8 +616,10 @@ ru, zh, ja, ko, ar, he, el, hi, th.
     print(f"Перевод комментариев из {args.input_file} в {args.output_file}...")
     print(f"Направление перевода: {args.source} → {args.target}")
     
-    if translate_comments(args.input_file, args.output_file, args.source, args.target):
+    if translate_comments(args.input_file, args.output_file, args.source, args.target,
+                          args.time_budget, args.char_budget):
         print("Перевод успешно завершен!")
+        print(get_template_stats())
     else:
         print("Произошла ошибка при переводе.", file=sys.stderr)
         sys.exit(1)
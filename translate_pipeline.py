@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from extract_inject_comments import extract_comments, build_locations, inject_translations
+from translate_from_to import (translate_comment_block, schedule_segments, comment_priority,
+                               TranslationBudget, BudgetExceeded, get_template_stats)
+
+# Маркер завершения работы для потоков-обработчиков
+_STOP = object()
+
+class FileJob:
+    """
+    Состояние одного файла, проходящего через конвейер.
+    """
+    def __init__(self, source_file, output_file):
+        self.source_file = source_file
+        self.output_file = output_file
+        self.source_lines = []
+        self.comments = []
+        self.locations = {}
+        self.translations = {}
+        self.source_hash = None
+        self.pending = 0
+        self.skipped = 0
+        # Комментарии, оставшиеся непереведенными после этого прохода
+        self.pending_ids = []
+        # Комментарии, перевод которых завершился ошибкой (а не нехваткой бюджета)
+        self.failed_ids = set()
+        # Данные предыдущего запуска: готовые переводы берутся из выходного файла,
+        # если исходный файл не изменился (previous_pending - непереведенные комментарии)
+        self.previous_hash = None
+        self.previous_pending = None
+        self.error = None
+        self.lock = threading.Lock()
+
+def find_python_files(paths, exclude_dir=None):
+    """
+    Собирает список Python файлов из указанных файлов и каталогов.
+
+    Args:
+        paths (list): Список путей к файлам или каталогам
+        exclude_dir (str, optional): Каталог, который не нужно обходить (например, выходной)
+
+    Returns:
+        list: Отсортированный список путей к .py файлам (без уже переведенных *_translated.py)
+    """
+    files = []
+    excluded = os.path.realpath(exclude_dir) if exclude_dir is not None else None
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                # Пропускаем скрытые и служебные каталоги, а также выходной каталог
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != '__pycache__'
+                                 and os.path.realpath(os.path.join(root, d)) != excluded)
+                for name in sorted(names):
+                    if name.endswith('.py') and not name.endswith('_translated.py'):
+                        files.append(os.path.join(root, name))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"Предупреждение: путь не найден: {path}", file=sys.stderr)
+    return files
+
+def build_jobs(paths, out_dir=None):
+    """
+    Формирует список заданий для конвейера.
+
+    Повторно указанные файлы (в том числе через другой путь) обрабатываются один раз.
+
+    Args:
+        paths (list): Список путей к файлам или каталогам
+        out_dir (str, optional): Каталог для результатов
+
+    Returns:
+        list: Список объектов FileJob
+
+    Raises:
+        ValueError: Если два исходных файла попадают в один выходной файл
+            или выходной файл совпадает с одним из исходных
+    """
+    jobs = []
+    sources = set()
+    for path in paths:
+        base_dir = path if os.path.isdir(path) else None
+        for source_file in find_python_files([path], out_dir):
+            real_source = os.path.realpath(source_file)
+            if real_source in sources:
+                continue
+            sources.add(real_source)
+            jobs.append(FileJob(source_file, get_output_path(source_file, base_dir, out_dir)))
+
+    outputs = {}
+    for job in jobs:
+        real_output = os.path.realpath(job.output_file)
+        if real_output in sources:
+            raise ValueError(f"выходной файл {job.output_file} совпадает с исходным файлом")
+        if real_output in outputs:
+            raise ValueError(f"файлы {outputs[real_output]} и {job.source_file} "
+                             f"сохраняются в один выходной файл {job.output_file}")
+        outputs[real_output] = job.source_file
+    return jobs
+
+def collect_previous_translations(job):
+    """
+    Восстанавливает готовые переводы из выходного файла предыдущего запуска.
+
+    Перевод комментария не меняет количество строк, поэтому переведенный
+    комментарий находится в выходном файле в тех же строках, что и в исходном.
+
+    Args:
+        job (FileJob): Задание с уже извлеченными комментариями
+
+    Returns:
+        dict: Словарь {"COMMENT_i": переведенный комментарий} для уже переведенных комментариев
+    """
+    if job.previous_pending is None or job.previous_hash != job.source_hash:
+        return {}
+    if not os.path.exists(job.output_file):
+        return {}
+
+    with open(job.output_file, 'r', encoding='utf-8') as f:
+        output_lines = f.read().splitlines(True)
+    if len(output_lines) != len(job.source_lines):
+        return {}
+
+    translations = {}
+    for comment_id, location in job.locations.items():
+        if comment_id in job.previous_pending:
+            continue
+        block = ''.join(output_lines[location["start_line"] - 1:location["end_line"]])
+        translations[comment_id] = block.rstrip('\r\n')
+    return translations
+
+def load_pending_manifest(manifest_file, jobs, source_lang, target_lang):
+    """
+    Загружает список непереведенных комментариев, сохраненный предыдущим запуском,
+    и помечает задания, для которых можно переиспользовать готовые переводы.
+
+    Args:
+        manifest_file (str): Путь к файлу со списком непереведенных комментариев
+        jobs (list): Список объектов FileJob
+        source_lang (str): Исходный язык (код языка)
+        target_lang (str): Целевой язык (код языка)
+    """
+    if not os.path.exists(manifest_file):
+        return
+
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("source_lang") != source_lang or manifest.get("target_lang") != target_lang:
+        return
+
+    files = manifest.get("files", {})
+    for job in jobs:
+        entry = files.get(os.path.realpath(job.source_file))
+        if entry and entry.get("output_file") == os.path.realpath(job.output_file):
+            job.previous_hash = entry.get("hash")
+            job.previous_pending = set(entry.get("pending", []))
+
+def save_pending_manifest(manifest_file, jobs, source_lang, target_lang):
+    """
+    Сохраняет список непереведенных комментариев для следующего запуска.
+    Если все комментарии переведены, файл удаляется.
+
+    Args:
+        manifest_file (str): Путь к файлу со списком непереведенных комментариев
+        jobs (list): Список обработанных объектов FileJob
+        source_lang (str): Исходный язык (код языка)
+        target_lang (str): Целевой язык (код языка)
+
+    Returns:
+        int: Количество непереведенных комментариев
+    """
+    completed = [job for job in jobs if job.error is None]
+    pending_count = sum(len(job.pending_ids) for job in completed)
+
+    if pending_count == 0:
+        if os.path.exists(manifest_file):
+            os.remove(manifest_file)
+        return 0
+
+    # Сохраняем и полностью переведенные файлы, чтобы не переводить их повторно
+    files = {}
+    for job in completed:
+        files[os.path.realpath(job.source_file)] = {
+            "output_file": os.path.realpath(job.output_file),
+            "hash": job.source_hash,
+            "pending": job.pending_ids
+        }
+
+    manifest_dir = os.path.dirname(manifest_file)
+    if manifest_dir:
+        os.makedirs(manifest_dir, exist_ok=True)
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump({"source_lang": source_lang, "target_lang": target_lang, "files": files}, f, indent=2)
+    return pending_count
+
+def get_output_path(source_file, base_dir=None, out_dir=None):
+    """
+    Определяет путь для сохранения переведенного файла.
+
+    Args:
+        source_file (str): Исходный Python файл
+        base_dir (str, optional): Каталог, относительно которого сохраняется структура в out_dir
+        out_dir (str, optional): Каталог для результатов (если None, создается копия с суффиксом _translated)
+
+    Returns:
+        str: Путь к выходному файлу
+    """
+    if out_dir is None:
+        base_name, ext = os.path.splitext(source_file)
+        return f"{base_name}_translated{ext}"
+
+    if base_dir is None:
+        relative = os.path.basename(source_file)
+    else:
+        relative = os.path.relpath(source_file, base_dir)
+    return os.path.join(out_dir, relative)
+
+def run_pipeline(jobs, source_lang, target_lang, workers=4, max_files=4, queue_size=64, budget=None,
+                 bands=None, report=True):
+    """
+    Переводит комментарии в наборе файлов конвейером из трех стадий:
+    извлечение -> перевод -> внедрение.
+
+    Стадии связаны ограниченными очередями, поэтому разбор следующего файла,
+    перевод сегментов текущего и запись предыдущего идут одновременно,
+    а объем данных в памяти не превышает заданных пределов.
+
+    Args:
+        jobs (list): Список объектов FileJob
+        source_lang (str): Исходный язык (код языка)
+        target_lang (str): Целевой язык (код языка)
+        workers (int): Количество потоков перевода
+        max_files (int): Максимальное количество файлов, одновременно находящихся в конвейере
+        queue_size (int): Размер очереди сегментов на перевод
+        budget (TranslationBudget, optional): Общий бюджет перевода; сегменты, не
+            уместившиеся в него, остаются без изменений
+        bands (set, optional): Приоритеты (см. comment_priority), комментарии которых
+            переводятся в этом проходе (None - все)
+        report (bool): Выводить ли строку о каждом записанном файле
+
+    Returns:
+        list: Список обработанных объектов FileJob (с полем error при ошибке)
+    """
+    segment_queue = queue.Queue(maxsize=queue_size)
+    inject_queue = queue.Queue(maxsize=max_files)
+    # Ограничивает число файлов, которые уже разобраны, но еще не записаны
+    in_flight = threading.BoundedSemaphore(max_files)
+    if budget is None:
+        budget = TranslationBudget()
+    done = []
+
+    def finish_segment(job):
+        # Когда переведен последний сегмент файла, передаем файл на запись
+        with job.lock:
+            job.pending -= 1
+            ready = job.pending == 0
+        if ready:
+            inject_queue.put(job)
+
+    def extractor():
+        for job in jobs:
+            in_flight.acquire()
+            try:
+                with open(job.source_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                # Строки сохраняем, чтобы внедрять переводы в тот же текст, из которого они извлечены
+                job.source_lines = content.splitlines(True)
+                job.source_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+                job.comments = extract_comments(job.source_file, content)
+                job.locations = build_locations(job.comments)
+                job.translations = collect_previous_translations(job)
+            except Exception as e:
+                job.error = e
+                job.comments = []
+            job.skipped = 0
+
+            queued = [comment_id for comment_id in schedule_segments(list(job.locations), job.locations)
+                      if comment_id not in job.translations
+                      and (bands is None or comment_priority(job.locations[comment_id]["type"]) in bands)]
+
+            # Файл, в котором нечего переводить, сразу передаем на запись
+            if job.error is not None or not queued:
+                inject_queue.put(job)
+                continue
+
+            job.pending = len(queued)
+            # Внутри файла отправляем на перевод сначала самые важные комментарии
+            for comment_id in queued:
+                text = job.comments[int(comment_id.split('_')[1])][0]
+                # put() блокируется при заполненной очереди - это и есть обратное давление
+                segment_queue.put((job, comment_id, text))
+
+        for _ in range(workers):
+            segment_queue.put(_STOP)
+
+    def translator():
+        while True:
+            item = segment_queue.get()
+            if item is _STOP:
+                break
+            job, comment_id, text = item
+            if budget.exhausted:
+                # Бюджет уже исчерпан - не тратим время на разбор блока
+                with job.lock:
+                    job.skipped += 1
+                finish_segment(job)
+                continue
+            try:
+                translated = translate_comment_block(text, source_lang, target_lang, budget)
+                with job.lock:
+                    job.translations[comment_id] = translated
+            except BudgetExceeded:
+                # Бюджет исчерпан - комментарий остается в оригинале
+                with job.lock:
+                    job.skipped += 1
+            except Exception as e:
+                # Непереведенный комментарий останется в оригинале
+                print(f"Ошибка перевода: {str(e)}, файл: {job.source_file}", file=sys.stderr)
+                with job.lock:
+                    job.failed_ids.add(comment_id)
+            finish_segment(job)
+
+    def injector():
+        for _ in range(len(jobs)):
+            job = inject_queue.get()
+            try:
+                if job.error is None:
+                    new_content = inject_translations(job.source_lines, job.translations, job.locations)
+
+                    output_dir = os.path.dirname(job.output_file)
+                    if output_dir:
+                        os.makedirs(output_dir, exist_ok=True)
+                    with open(job.output_file, 'w', encoding='utf-8') as f:
+                        f.write(new_content)
+            except Exception as e:
+                job.error = e
+
+            job.pending_ids = sorted((comment_id for comment_id in job.locations if comment_id not in job.translations),
+                                     key=lambda comment_id: int(comment_id.split('_')[1]))
+
+            status = "ошибка: " + str(job.error) if job.error else f"{len(job.comments)} комментариев"
+            if job.skipped:
+                status += f", не переведено из-за бюджета: {job.skipped}"
+            if report:
+                print(f"[{len(done) + 1}/{len(jobs)}] {job.source_file} -> {job.output_file} ({status})")
+
+            # Освобождаем память, занятую данными файла
+            job.source_lines = []
+            job.comments = []
+            job.locations = {}
+            job.translations = {}
+            done.append(job)
+            in_flight.release()
+
+    threads = [threading.Thread(target=extractor, daemon=True),
+               threading.Thread(target=injector, daemon=True)]
+    threads += [threading.Thread(target=translator, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return done
+
+def translate_files(jobs, source_lang, target_lang, workers=4, max_files=4, queue_size=64,
+                    budget=None, manifest_file=None):
+    """
+    Переводит набор файлов с учетом бюджета и результатов предыдущего запуска.
+
+    При ограниченном бюджете файлы проходят конвейер несколько раз: сначала во всех
+    файлах переводятся docstring, затем однострочные комментарии, затем комментарии
+    в конце строки. Каждый проход берет готовые переводы из выходных файлов
+    предыдущего, поэтому приоритет соблюдается по всему проекту, а память
+    по-прежнему ограничена числом файлов в конвейере.
+
+    Args:
+        jobs (list): Список объектов FileJob
+        source_lang (str): Исходный язык (код языка)
+        target_lang (str): Целевой язык (код языка)
+        workers (int): Количество потоков перевода
+        max_files (int): Максимальное количество файлов, одновременно находящихся в конвейере
+        queue_size (int): Размер очереди сегментов на перевод
+        budget (TranslationBudget, optional): Общий бюджет перевода
+        manifest_file (str, optional): Файл со списком непереведенных комментариев
+            для продолжения перевода при следующем запуске
+
+    Returns:
+        tuple: (список обработанных FileJob, количество непереведенных комментариев)
+    """
+    if manifest_file is not None:
+        load_pending_manifest(manifest_file, jobs, source_lang, target_lang)
+
+    if budget is not None and budget.is_limited():
+        passes = [{band} for band in range(comment_priority(None) + 1)]
+    else:
+        passes = [None]
+
+    done = []
+    for index, bands in enumerate(passes):
+        done = run_pipeline(jobs, source_lang, target_lang, workers, max_files, queue_size,
+                            budget, bands, report=len(passes) == 1)
+        # После исчерпания бюджета следующие проходы ничего бы не перевели - файлы
+        # уже записаны, а pending_ids содержат все непереведенные комментарии
+        if index == len(passes) - 1 or budget.exhausted:
+            break
+        # Следующий проход берет готовые переводы из только что записанных файлов
+        for job in jobs:
+            job.previous_hash = job.source_hash if job.error is None else None
+            job.previous_pending = set(job.pending_ids) if job.error is None else None
+            job.error = None
+
+    if len(passes) > 1:
+        for job in done:
+            status = "ошибка: " + str(job.error) if job.error else f"не переведено: {len(job.pending_ids)}"
+            print(f"{job.source_file} -> {job.output_file} ({status})")
+
+    pending_count = sum(len(job.pending_ids) for job in done if job.error is None)
+    if manifest_file is not None:
+        save_pending_manifest(manifest_file, done, source_lang, target_lang)
+    return done, pending_count
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Конвейерный перевод комментариев во множестве Python-файлов',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Примеры использования:
+  python translate_pipeline.py project/ -s ru -t en
+    Переводит комментарии во всех .py файлах каталога project/
+    Для каждого файла создается копия с суффиксом _translated
+
+  python translate_pipeline.py project/ -d project_en/ -w 8
+    Сохраняет переведенные файлы в каталог project_en/ с сохранением структуры,
+    используя 8 потоков перевода
+
+  python translate_pipeline.py project/ -d project_en/ --time-budget 600
+    Переводит за 10 минут сначала docstring всех файлов, затем остальные комментарии;
+    непереведенное будет переведено при повторном запуске той же командой
+"""
+    )
+    parser.add_argument('paths', nargs='*', help='Python файлы или каталоги для перевода')
+    parser.add_argument('-s', '--source', default='ru', help='Исходный язык (по умолчанию: ru)')
+    parser.add_argument('-t', '--target', default='en', help='Целевой язык (по умолчанию: en)')
+    parser.add_argument('-d', '--out-dir', help='Каталог для сохранения переведенных файлов (по умолчанию создается копия с суффиксом _translated)')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='Количество потоков перевода (по умолчанию: 4)')
+    parser.add_argument('--max-files', type=int, default=4, help='Максимальное число файлов в конвейере одновременно (по умолчанию: 4)')
+    parser.add_argument('--time-budget', type=float, help='Лимит времени на перевод в секундах')
+    parser.add_argument('--char-budget', type=int, help='Лимит количества символов, отправляемых на перевод')
+    parser.add_argument('--pending-file', help='Файл со списком непереведенных комментариев для следующего запуска (по умолчанию: translate_pipeline.pending.json в выходном каталоге или в текущем каталоге)')
+    parser.add_argument('--queue-size', type=int, default=64, help='Размер очереди сегментов на перевод (по умолчанию: 64)')
+
+    args = parser.parse_args()
+
+    if not args.paths:
+        parser.print_help()
+        return
+
+    if args.workers < 1 or args.max_files < 1 or args.queue_size < 1:
+        print("Ошибка: --workers, --max-files и --queue-size должны быть положительными", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        jobs = build_jobs(args.paths, args.out_dir)
+    except ValueError as e:
+        print(f"Ошибка: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    if not jobs:
+        print("Не найдено Python файлов для перевода.", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Перевод комментариев в {len(jobs)} файлах...")
+    print(f"Направление перевода: {args.source} → {args.target}")
+
+    manifest_file = args.pending_file
+    if manifest_file is None:
+        manifest_file = os.path.join(args.out_dir or '.', 'translate_pipeline.pending.json')
+
+    started = time.time()
+    budget = TranslationBudget(args.time_budget, args.char_budget)
+    done, pending_count = translate_files(jobs, args.source, args.target, args.workers, args.max_files,
+                                          args.queue_size, budget, manifest_file)
+    failed = [job for job in done if job.error is not None]
+
+    print(f"Обработано файлов: {len(done) - len(failed)} из {len(jobs)} за {time.time() - started:.1f} с")
+    print(get_template_stats())
+    failed_count = sum(len(job.failed_ids & set(job.pending_ids)) for job in done if job.error is None)
+    if failed_count:
+        print(f"Не удалось перевести из-за ошибок комментариев: {failed_count}", file=sys.stderr)
+    if pending_count > failed_count:
+        print(f"Бюджет исчерпан: не переведено комментариев: {pending_count - failed_count}")
+    if pending_count:
+        print(f"Список непереведенных комментариев сохранен в файл: {manifest_file}")
+    if failed:
+        print(f"Файлов с ошибками: {len(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()